@@ -1,26 +1,100 @@
 """Common utilities for ETL scripts."""
 
+import asyncio
+import atexit
 import logging
+import os
 import sys
+import tempfile
+from functools import lru_cache
 from hashlib import sha256
-from io import BytesIO
-from typing import Tuple
+from pathlib import Path
+from typing import Optional, Tuple
 
 import geopandas as gpd
 import httpx
+import pandas as pd
+import yaml
 from gerrydb.schemas import ColumnKind, ColumnType
+from jinja2 import Template
 from pydantic import BaseModel, Field
 
+# Prefer libyaml's C loader (when PyYAML is built with it) to the pure-Python one.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Prefer pyogrio's bulk columnar reader (with Arrow, if available) to Fiona's
+# feature-by-feature reads. (Recent versions of GeoPandas do this by default.)
+try:
+    import pyogrio  # noqa: F401
+
+    READ_FILE_KWARGS = {"engine": "pyogrio"}
+    try:
+        import pyarrow  # noqa: F401
+
+        READ_FILE_KWARGS["use_arrow"] = True
+    except ImportError:
+        pass
+except ImportError:
+    READ_FILE_KWARGS = {}
+
 COLUMN_TYPE_TO_PY_TYPE = {
     ColumnType.BOOL: bool,
     ColumnType.FLOAT: float,
     ColumnType.INT: int,
     ColumnType.STR: str,
 }
+PY_TYPE_TO_DTYPE_CHECK = {
+    bool: pd.api.types.is_bool_dtype,
+    float: pd.api.types.is_float_dtype,
+    int: pd.api.types.is_integer_dtype,
+    str: pd.api.types.is_string_dtype,
+}
+
+# The census has started blocking requests from httpx, so we need to pretend to be a browser.
+DOWNLOAD_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/110.0.5481.77 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_MAX_CONNECTIONS = 16
+DOWNLOAD_TIMEOUT = httpx.Timeout(60, connect=10)
+# Downloads of immutable archives (e.g. TIGER shapefiles) can be cached here.
+DOWNLOAD_CACHE_DIR = Path(
+    os.getenv("GERRYDB_ETL_CACHE_DIR", Path.home() / ".cache" / "gerrydb-etl")
+)
 
 log = logging.getLogger()
 
 
+@lru_cache(maxsize=None)
+def _client() -> httpx.Client:
+    """Returns the client shared by synchronous downloads.
+
+    Sharing one connection pool means repeated downloads from the same host
+    (www2.census.gov) reuse TCP/TLS connections. The client is only created
+    on first use, so scripts that never download don't open one.
+    """
+    client = httpx.Client(
+        timeout=DOWNLOAD_TIMEOUT,
+        limits=httpx.Limits(
+            max_keepalive_connections=DOWNLOAD_MAX_CONNECTIONS,
+            max_connections=2 * DOWNLOAD_MAX_CONNECTIONS,
+        ),
+    )
+    atexit.register(client.close)
+    return client
+
+
 def config_logger(logger: logging.Logger) -> None:
     """Configures a logger to write to `stderr`."""
     handler = logging.StreamHandler(sys.stderr)
@@ -30,32 +104,137 @@ def config_logger(logger: logging.Logger) -> None:
     logger.addHandler(handler)
 
 
+def read_dataframe(
+    path: str, *args, dtypes: Optional[dict[str, type]] = None, **kwargs
+) -> gpd.GeoDataFrame:
+    """Reads a (Geo)DataFrame from a file, casting columns to `dtypes`.
+
+    Columns in `dtypes` that are missing from the file are ignored, as are
+    columns that already have a compatible type. String columns are never
+    cast (`astype(str)` turns missing values into the strings "None" and
+    "nan"), and integer and boolean columns are only cast when they have no
+    missing values, which those types can't represent.
+    """
+    df = gpd.read_file(path, *args, **{**READ_FILE_KWARGS, **kwargs})
+    if dtypes:
+        casts = {
+            col: dtype
+            for col, dtype in dtypes.items()
+            if col in df.columns
+            and dtype is not str
+            and not PY_TYPE_TO_DTYPE_CHECK[dtype](df[col])
+            and not (dtype in (int, bool) and df[col].hasnans)
+        }
+        if casts:
+            df = df.astype(casts)
+    return df
+
+
+def download_cache_path(url: str) -> Path:
+    """Returns the download cache path for a URL."""
+    url_hash = sha256(url.encode(), usedforsecurity=False).hexdigest()
+    return DOWNLOAD_CACHE_DIR / f"{url_hash}{os.path.splitext(url)[1]}"
+
+
+def file_hash(path: Path):
+    """Returns the SHA256 hash of a file's contents."""
+    content_hash = sha256(usedforsecurity=False)
+    with open(path, "rb") as fp:
+        while chunk := fp.read(DOWNLOAD_CHUNK_SIZE):
+            content_hash.update(chunk)
+    return content_hash
+
+
+async def _stream_to_file(client: httpx.AsyncClient, url: str, fp):
+    """Streams a download to an open file, returning the hash of its contents."""
+    log.info("Downloading %s...", url)
+    # The hash only records provenance in import notes; it is not a security check.
+    content_hash = sha256(usedforsecurity=False)
+    async with client.stream("GET", url, headers=DOWNLOAD_HEADERS) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            content_hash.update(chunk)
+            fp.write(chunk)
+    fp.flush()
+    log.info("Downloaded %s (SHA256: %s)", url, content_hash.hexdigest())
+    return content_hash
+
+
+async def download_dataframe_with_hash_async(
+    client: httpx.AsyncClient, url: str, *args, cache: bool = False, **kwargs
+) -> Tuple[gpd.GeoDataFrame, str]:
+    """Returns a (Geo)DataFrame and a file hash from a downloaded file.
+
+    The file is streamed to a temporary file on disk and hashed as it arrives,
+    so concurrent downloads do not hold entire archives in memory.
+
+    If `cache` is set, the file is kept in `DOWNLOAD_CACHE_DIR` and reused by
+    later calls for the same URL. Only use this for files that never change.
+    """
+    # Parsing is blocking, so it runs in a worker thread; other downloads
+    # keep streaming on the event loop in the meantime.
+    if not cache:
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(url)[1]) as tmp:
+            content_hash = await _stream_to_file(client, url, tmp)
+            df = await asyncio.to_thread(read_dataframe, tmp.name, *args, **kwargs)
+            return df, content_hash
+
+    cache_path = download_cache_path(url)
+    if cache_path.exists():
+        log.info("Using cached download of %s (%s)", url, cache_path)
+        content_hash = await asyncio.to_thread(file_hash, cache_path)
+    else:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Download next to the cache entry and move it into place when complete,
+        # so an interrupted download never leaves a partial entry behind.
+        with tempfile.NamedTemporaryFile(
+            dir=cache_path.parent, suffix=cache_path.suffix, delete=False
+        ) as tmp:
+            try:
+                content_hash = await _stream_to_file(client, url, tmp)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        os.replace(tmp.name, cache_path)
+    df = await asyncio.to_thread(read_dataframe, str(cache_path), *args, **kwargs)
+    return df, content_hash
+
+
+async def download_dataframes_with_hash_async(
+    urls: list[str], *args, **kwargs
+) -> list[Tuple[gpd.GeoDataFrame, str]]:
+    """Downloads several (Geo)DataFrames concurrently over a shared client."""
+    async with httpx.AsyncClient(
+        timeout=DOWNLOAD_TIMEOUT,
+        limits=httpx.Limits(max_connections=DOWNLOAD_MAX_CONNECTIONS),
+    ) as client:
+        return await asyncio.gather(
+            *(
+                download_dataframe_with_hash_async(client, url, *args, **kwargs)
+                for url in urls
+            )
+        )
+
+
 def download_dataframe_with_hash(
     url: str, *args, **kwargs
 ) -> Tuple[gpd.GeoDataFrame, str]:
     """Returns a (Geo)DataFrame and a file hash from a downloaded file."""
     log.info("Downloading %s...", url)
-    # The census has started blocking requests from httpx, so we need to pretend to be a browser.
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/110.0.5481.77 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    response = httpx.get(url, headers=headers)
-    response.raise_for_status()
-
-    content = BytesIO(response.content)
-    content_hash = sha256(content.getbuffer())
-    log.info("Downloaded %s (SHA256: %s)", url, content_hash.hexdigest())
-    return gpd.read_file(content, *args, **kwargs), content_hash
+    # The hash only records provenance in import notes; it is not a security check.
+    content_hash = sha256(usedforsecurity=False)
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(url)[1]) as tmp:
+        with _client().stream("GET", url, headers=DOWNLOAD_HEADERS) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                content_hash.update(chunk)
+                tmp.write(chunk)
+        tmp.flush()
+        log.info("Downloaded %s (SHA256: %s)", url, content_hash.hexdigest())
+        return read_dataframe(tmp.name, *args, **kwargs), content_hash
 
 
+@lru_cache(maxsize=4096)
 def pathify(name: str) -> str:
     """Converts a pretty name to a root-level path."""
     return name.strip().lower().replace(" ", "-").replace(".", "")
@@ -91,3 +270,18 @@ class TabularConfig(BaseModel):
             for column in self.columns
             if column.type in COLUMN_TYPE_TO_PY_TYPE
         }
+
+
+@lru_cache(maxsize=None)
+def _config_template(path: Path, mtime: float) -> Template:
+    """Compiles a config template (cached until the template is modified)."""
+    with open(path) as config_fp:
+        return Template(config_fp.read())
+
+
+def load_tabular_config(path: Path, **template_args) -> TabularConfig:
+    """Renders a templated YAML import configuration and parses it."""
+    path = Path(path)
+    config_template = _config_template(path, path.stat().st_mtime)
+    rendered_config = config_template.render(**template_args)
+    return TabularConfig(**yaml.load(rendered_config, Loader=SafeLoader))
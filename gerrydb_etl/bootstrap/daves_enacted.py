@@ -1,4 +1,7 @@
 """Loads enacted plans from Dave's Redistricting."""
+import asyncio
+import json
+
 import click
 import httpx
 
@@ -13,26 +16,46 @@ SPECIAL_PLANS = {
     "NC 118th Congressional (Court Approved - HB 1029)": "nc_congress_hb_2019",
 }
 
+FETCH_MAX_CONNECTIONS = 32
+FETCH_TIMEOUT = httpx.Timeout(30, connect=10)
+
+
+async def fetch_plan(client: httpx.AsyncClient, plan: dict) -> tuple[dict, dict | None]:
+    """Fetches a plan's session metadata and edit cache."""
+    response = await client.post(f"{CONNECT_BASE_URL}/{plan['id']}")
+    plan_data = response.json()
+    try:
+        response = await client.get(f"{EDIT_CACHE_BASE_URL}/{plan_data['editcache']}")
+        response.raise_for_status()
+        return plan_data, response.json()
+    except httpx.HTTPError as ex:
+        print(ex)
+        return plan_data, None
+
+
+async def fetch_plans(plans: list[dict]) -> list[tuple[dict, dict | None]]:
+    """Fetches plans concurrently over a shared connection pool."""
+    async with httpx.AsyncClient(
+        timeout=FETCH_TIMEOUT,
+        limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS),
+    ) as client:
+        return await asyncio.gather(*(fetch_plan(client, plan) for plan in plans))
+
 
 @click.command()
 def main():
     """Scrapes plans from Dave's Redistricting."""
-    import json
-
     plans_index = httpx.get(PLANS_URL).json()
     for state, state_data in plans_index.items():
-        for plan in state_data["plans"]:
+        plans = state_data["plans"]
+        for plan, (plan_data, plan_edit_cache) in zip(
+            plans, asyncio.run(fetch_plans(plans))
+        ):
             print(plan)
-            plan_data = httpx.post(f"{CONNECT_BASE_URL}/{plan['id']}").json()
             print(json.dumps(plan_data, indent=4))
             print(f"{EDIT_CACHE_BASE_URL}/{plan_data['editcache']}")
-            try:
-                response = httpx.get(f"{EDIT_CACHE_BASE_URL}/{plan_data['editcache']}")
-                response.raise_for_status()
-                plan_edit_cache = response.json()
+            if plan_edit_cache is not None:
                 print(json.dumps(plan_edit_cache, indent=4))
-            except httpx.HTTPError as ex:
-                print(ex)
         break
 
 
@@ -30,39 +30,42 @@ MissingDataset = namedtuple("MissingDataset", ["fips", "level", "year"])
 
 # A few states don't participate or didn't historically participate
 # in VTD releases. Outlying territories typically don't have Census VTDs either.
-MISSING_DATASETS = (
-    # California 2020 VTDs.
-    # Not available from the Census. Statewide Database (CA only) doesn't seem
-    # to have them, and Redistricting Data Hub's publication is spurious
-    # (each of the 58 VTDs have the name "Voting Districts not defined").
-    MissingDataset("06", "vtd", "2020"),
-    # California 2020 VTDs.
-    # Not available from the Census.
-    # Redistricting Data Hub's publication is spurious
-    # (each of the VTDs have the name "Voting Districts not defined").
-    MissingDataset("15", "vtd", "2020"),
-    # Kentucky 2010 VTDs.
-    # Not available from the Census.
-    # Redistricting Data Hub's publication is spurious
-    # (each of the VTDs have the name "Voting Districts not defined").
-    MissingDataset("21", "vtd", "2010"),
-    # Oregon 2020 VTDs.
-    # Not available from the Census.
-    # Redistricting Data Hub's publication is spurious
-    # (each of the VTDs have the name "Voting Districts not defined").
-    MissingDataset("41", "vtd", "2020"),
-    # Rhode Island VTDs.
-    # Not available from the Census.
-    # Redistricting Data Hub's publication is spurious
-    # (each of the VTDs have the name "Voting Districts not defined").
-    MissingDataset("44", "vtd", "2010"),
-    # Outlying territories.
-    MissingDataset("60", "vtd", "2010"),  # American Samoa
-    MissingDataset("60", "vtd", "2020"),
-    MissingDataset("66", "vtd", "2010"),  # Guam
-    MissingDataset("66", "vtd", "2020"),
-    MissingDataset("69", "vtd", "2010"),  # Northern Mariana Islands
-    MissingDataset("69", "vtd", "2020"),
-    MissingDataset("78", "vtd", "2010"),  # U.S. Virgin Islands
-    MissingDataset("78", "vtd", "2020"),
+# (A frozenset, so membership checks are constant-time.)
+MISSING_DATASETS = frozenset(
+    {
+        # California 2020 VTDs.
+        # Not available from the Census. Statewide Database (CA only) doesn't seem
+        # to have them, and Redistricting Data Hub's publication is spurious
+        # (each of the 58 VTDs have the name "Voting Districts not defined").
+        MissingDataset("06", "vtd", "2020"),
+        # California 2020 VTDs.
+        # Not available from the Census.
+        # Redistricting Data Hub's publication is spurious
+        # (each of the VTDs have the name "Voting Districts not defined").
+        MissingDataset("15", "vtd", "2020"),
+        # Kentucky 2010 VTDs.
+        # Not available from the Census.
+        # Redistricting Data Hub's publication is spurious
+        # (each of the VTDs have the name "Voting Districts not defined").
+        MissingDataset("21", "vtd", "2010"),
+        # Oregon 2020 VTDs.
+        # Not available from the Census.
+        # Redistricting Data Hub's publication is spurious
+        # (each of the VTDs have the name "Voting Districts not defined").
+        MissingDataset("41", "vtd", "2020"),
+        # Rhode Island VTDs.
+        # Not available from the Census.
+        # Redistricting Data Hub's publication is spurious
+        # (each of the VTDs have the name "Voting Districts not defined").
+        MissingDataset("44", "vtd", "2010"),
+        # Outlying territories.
+        MissingDataset("60", "vtd", "2010"),  # American Samoa
+        MissingDataset("60", "vtd", "2020"),
+        MissingDataset("66", "vtd", "2010"),  # Guam
+        MissingDataset("66", "vtd", "2020"),
+        MissingDataset("69", "vtd", "2010"),  # Northern Mariana Islands
+        MissingDataset("69", "vtd", "2020"),
+        MissingDataset("78", "vtd", "2010"),  # U.S. Virgin Islands
+        MissingDataset("78", "vtd", "2020"),
+    }
 )
@@ -2,23 +2,27 @@
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import geopandas as gpd
 import click
-import shapely.wkb
-import yaml
+import numpy as np
+import pandas as pd
+import shapely
 from gerrydb import GerryDB
-from gerrydb_etl import TabularConfig, config_logger, download_dataframe_with_hash
+from gerrydb_etl import (
+    config_logger,
+    download_dataframe_with_hash,
+    load_tabular_config,
+)
 from gerrydb_etl.bootstrap.pl_config import (
     AUXILIARY_LEVELS,
     LEVELS,
     MISSING_DATASETS,
     MissingDataset,
 )
-from jinja2 import Template
-from shapely import Point
 
 try:
     from gerrydb_etl.db import DirectTransactionContext
@@ -53,6 +57,11 @@ LAYER_URLS = {
 }
 
 COLUMN_CONFIG_PATH = Path(__file__).parent / "columns" / "pl_geo.yaml"
+# Concurrent county mapping requests in the API import path. These share one
+# GerryDB write context, which is not known to be thread-safe, so counties are
+# mapped sequentially by default. Raising this (`GERRYDB_MAP_LOCALITY_WORKERS`)
+# assumes `map_locality` only sends a request and keeps no per-call state.
+MAP_LOCALITY_WORKERS = int(os.getenv("GERRYDB_MAP_LOCALITY_WORKERS", "1"))
 
 
 @click.command()
@@ -68,9 +77,17 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
         * `namespace` exists.
         * A `GeoLayer` with path `<level>/<year>` exists in the namespace.
     """
+    import_geo(fips=fips, level=level, year=year, namespace=namespace)
+
+
+def import_geo(fips: str, level: str, year: str, namespace: str) -> None:
+    """Imports base Census geographies for one state/territory, level, and year.
+
+    See `load_geo` for preconditions.
+    """
     if MissingDataset(fips=fips, level=level, year=year) in MISSING_DATASETS:
         log.warning("Dataset not published by Census. Nothing to do.")
-        exit()
+        return
 
     if os.getenv("GERRYDB_BULK_IMPORT") and crud is None:
         raise RuntimeError("gerrydb_meta must be available in bulk import mode.")
@@ -79,25 +96,31 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
     root_loc = db.localities[fips]
     layer = db.geo_layers[level]
 
-    with open(COLUMN_CONFIG_PATH) as config_fp:
-        config_template = Template(config_fp.read())
-    rendered_config = config_template.render(yr=year[2:], year=year)
-    config = TabularConfig(**yaml.safe_load(rendered_config))
+    config = load_tabular_config(COLUMN_CONFIG_PATH, yr=year[2:], year=year)
 
     layer_url = LAYER_URLS[f"{level}/{year}"].format(fips=fips)
     index_col = "GEOID" + year[2:]
     county_col = "COUNTYFP" + year[2:]
+    # Only parse the attributes we use; TIGER shapefiles have many more.
+    # (Columns missing from a particular layer are ignored by the reader.)
+    source_cols = sorted(
+        {index_col, county_col, f"INTPTLAT{year[2:]}", f"INTPTLON{year[2:]}"}
+        | {col.source for col in config.columns}
+    )
+    source_dtypes = config.source_dtypes()
 
     # to handle server side issues, try loading one more time if fail
     try:
         layer_gdf, layer_hash = download_dataframe_with_hash(
             url=layer_url,
-            dtypes=config.source_dtypes(),
+            columns=source_cols,
+            dtypes=source_dtypes,
         )
     except:
         layer_gdf, layer_hash = download_dataframe_with_hash(
             url=layer_url,
-            dtypes=config.source_dtypes(),
+            columns=source_cols,
+            dtypes=source_dtypes,
         )
 
     # Some geographies have a '/' in the geoid, which will mess up the path, so we remove it
@@ -115,11 +138,18 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
     if len(layer_gdf) < n_rows:
         log.info(f"Dropped {n_rows - len(layer_gdf)} duplicate rows")
 
-    geos_by_county = (
-        dict(layer_gdf.groupby(county_col)[index_col].apply(list))
-        if county_col in layer_gdf.columns
-        else {}
-    )
+    if county_col in layer_gdf.columns:
+        # `indices` maps each county to the positions of its rows in one pass,
+        # avoiding a Python-level `apply` per group.
+        geoids = layer_gdf[index_col].to_numpy()
+        geos_by_county = {
+            county: geoids[positions].tolist()
+            for county, positions in layer_gdf.groupby(
+                county_col, sort=False
+            ).indices.items()
+        }
+    else:
+        geos_by_county = {}
 
     if level in AUXILIARY_LEVELS:
         # since aiannh geographies cross state lines, the census subidivides the polygon but
@@ -128,66 +158,63 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
         # remove the r,t that stands for reservation, trust which only appears
         # at geo level, but not in pop data
         if level == "aiannh":
-
-            def categorize_trust_res(x):
-                if x[-1].lower() == "t":
-                    return "trust"
-                elif x[-1].lower() == "r":
-                    return "reservation"
-                else:
-                    raise ValueError(f"Not a trust or reservation at geoid {x}")
-
-            layer_gdf["res_trust_class"] = layer_gdf[index_col].apply(
-                lambda x: categorize_trust_res(x)
+            suffixes = layer_gdf[index_col].str[-1].str.lower()
+            res_trust_class = np.where(
+                suffixes == "t",
+                "trust",
+                np.where(suffixes == "r", "reservation", None),
             )
-            layer_gdf[index_col] = layer_gdf[index_col].apply(
-                lambda x: f"{level}:" + x.rstrip("rtRT") + f":fips{fips}"
+            unclassified = pd.isna(res_trust_class)
+            if unclassified.any():
+                raise ValueError(
+                    "Not a trust or reservation at geoid "
+                    f"{layer_gdf[index_col][unclassified].iloc[0]}"
+                )
+            layer_gdf["res_trust_class"] = res_trust_class
+            layer_gdf[index_col] = (
+                f"{level}:" + layer_gdf[index_col].str.rstrip("rtRT") + f":fips{fips}"
             )
             yr = year[2:]
 
-            # if there was a geoid with both an R and T tag
-            if len(layer_gdf[index_col]) != len(set(layer_gdf[index_col])):
-                new_rows = {}
-
-                for row, data in layer_gdf.iterrows():
-                    if data[index_col] not in new_rows:
-                        new_rows[data[index_col]] = data
-                        new_rows[data[index_col]]["collision_count"] = 0
-
-                    # if geoid already exists, indicates R/T collision
-                    else:
-                        new_rows[data[index_col]]["collision_count"] += 1
-                        if new_rows[data[index_col]]["collision_count"] > 1:
-                            raise ValueError(
-                                f"There has been a collision of 3 geoids {data[index_col]}"
-                            )
-
-                        # add land and water, change res/trust class, union geometry
-                        new_rows[data[index_col]][f"ALAND{yr}"] += data[f"ALAND{yr}"]
-                        new_rows[data[index_col]][f"AWATER{yr}"] += data[f"AWATER{yr}"]
-                        new_rows[data[index_col]]["res_trust_class"] = "union"
-                        new_rows[data[index_col]]["geometry"] = shapely.unary_union(
-                            [new_rows[data[index_col]]["geometry"], data["geometry"]]
-                        )
-
-                        if new_rows[data[index_col]][f"NAME{yr}"] != data[f"NAME{yr}"]:
-                            if data[index_col] in [
-                                "aiannh:1075:fips32",
-                                "aiannh:1070:fips32",
-                            ]:
-                                # the Fallon Paiute-Shoshone name has an extra (Reservation/Colony) appended
-                                pass
-                            else:
-                                print("geoid", (data[index_col]))
-                                print("name 1", new_rows[data[index_col]][f"NAME{yr}"])
-                                print("name 2", data[f"NAME{yr}"])
-                                raise ValueError(
-                                    f"NAME{yr} does not match across R and T land in geoid {data[index_col]}"
-                                )
-
-                layer_gdf = gpd.GeoDataFrame.from_dict(
-                    new_rows, orient="index"
-                ).set_crs(layer_gdf.crs)
+            # if there was a geoid with both an R and T tag, merge the pieces:
+            # add land and water, change res/trust class, union geometry
+            if layer_gdf[index_col].duplicated().any():
+                grouped = layer_gdf.groupby(index_col, sort=False)
+                counts = grouped.size()
+                if (counts > 2).any():
+                    raise ValueError(
+                        "There has been a collision of 3 geoids "
+                        f"{counts.index[counts > 2][0]}"
+                    )
+
+                # the Fallon Paiute-Shoshone name has an extra
+                # (Reservation/Colony) appended
+                name_counts = grouped[f"NAME{yr}"].nunique()
+                mismatched = name_counts.index[name_counts > 1].difference(
+                    ["aiannh:1075:fips32", "aiannh:1070:fips32"]
+                )
+                if len(mismatched) > 0:
+                    names = grouped[f"NAME{yr}"].unique()[mismatched[0]]
+                    raise ValueError(
+                        f"NAME{yr} does not match across R and T land in geoid "
+                        f"{mismatched[0]}: {list(names)}"
+                    )
+
+                # Each geoid keeps its first row as is (nulls included), as the
+                # row-wise merge did; only collided geographies are combined.
+                first_rows = layer_gdf.drop_duplicates(index_col).set_index(index_col)
+                is_collided = layer_gdf[index_col].isin(counts.index[counts > 1])
+                collided = layer_gdf[is_collided].groupby(index_col, sort=False)
+                area_cols = [f"ALAND{yr}", f"AWATER{yr}"]
+                # (Summed without skipping nulls, like the row-wise `+=`.)
+                areas = collided[area_cols].agg(lambda areas: areas.sum(skipna=False))
+                unions = collided["geometry"].agg(
+                    lambda geoms: shapely.unary_union(geoms.to_numpy())
+                )
+                first_rows.loc[areas.index, area_cols] = areas.to_numpy()
+                first_rows.loc[unions.index, "res_trust_class"] = "union"
+                first_rows.loc[unions.index, "geometry"] = unions.to_numpy()
+                layer_gdf = first_rows.reset_index()
             layer_gdf = layer_gdf[
                 [
                     f"NAME{yr}",
@@ -213,11 +240,16 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
         if col.source in layer_gdf.columns
     }
 
-    internal_latitudes = layer_gdf[f"INTPTLAT{year[2:]}"].apply(float)
-    internal_longitudes = layer_gdf[f"INTPTLON{year[2:]}"].apply(float)
-    layer_gdf["internal_point"] = [
-        Point(long, lat) for long, lat in zip(internal_longitudes, internal_latitudes)
-    ]
+    internal_latitudes = pd.to_numeric(layer_gdf[f"INTPTLAT{year[2:]}"])
+    internal_longitudes = pd.to_numeric(layer_gdf[f"INTPTLON{year[2:]}"])
+    layer_gdf["internal_point"] = gpd.GeoSeries(
+        shapely.points(
+            internal_longitudes.to_numpy(dtype="float64"),
+            internal_latitudes.to_numpy(dtype="float64"),
+        ),
+        index=layer_gdf.index,
+        crs=layer_gdf.crs,
+    )
 
     import_notes = (
         f"Loaded by ETL script {__name__} from {year} U.S. Census {level} "
@@ -238,13 +270,23 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
             geo_import, _ = crud.geo_import.create(
                 db=ctx.db, obj_meta=ctx.meta, namespace=namespace_obj
             )
+            # Serialize each geometry column in one vectorized call. The
+            # geographies come straight from our own shapefile parse, so skip
+            # per-object validation (`construct` on pydantic v1).
+            construct_geography = getattr(
+                schemas.GeographyCreate,
+                "model_construct",
+                schemas.GeographyCreate.construct,
+            )
             geographies_raw = [
-                schemas.GeographyCreate(
-                    path=row.Index,
-                    geography=shapely.wkb.dumps(row.geometry),
-                    internal_point=shapely.wkb.dumps(row.internal_point),
+                construct_geography(
+                    path=path, geography=geography, internal_point=internal_point
+                )
+                for path, geography, internal_point in zip(
+                    layer_gdf.index.to_numpy(),
+                    shapely.to_wkb(layer_gdf.geometry.to_numpy()),
+                    shapely.to_wkb(layer_gdf["internal_point"].to_numpy()),
                 )
-                for row in layer_gdf.itertuples()
             ]
             geographies, _ = crud.geography.create_bulk(
                 db=ctx.db,
@@ -257,21 +299,24 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
 
             # Update column values in bulk.
             log.info("Updating column values...")
+            # Join each column to its canonical reference in one query (rather
+            # than filtering on a subquery), selecting the path directly to
+            # avoid a lazy load of `canonical_ref` per column.
             raw_cols = (
-                ctx.db.query(models.DataColumn)
+                ctx.db.query(models.DataColumn, models.ColumnRef.path)
+                .join(
+                    models.ColumnRef,
+                    models.ColumnRef.col_id == models.DataColumn.col_id,
+                )
                 .filter(
-                    models.DataColumn.col_id.in_(
-                        select(models.ColumnRef.col_id).filter(
-                            models.ColumnRef.path.in_(
-                                col.canonical_path for col in columns.values()
-                            ),
-                            models.ColumnRef.namespace_id == namespace_obj.namespace_id,
-                        )
-                    )
+                    models.ColumnRef.path.in_(
+                        [col.canonical_path for col in columns.values()]
+                    ),
+                    models.ColumnRef.namespace_id == namespace_obj.namespace_id,
                 )
                 .all()
             )
-            cols_by_canonical_path = {col.canonical_ref.path: col for col in raw_cols}
+            cols_by_canonical_path = {path: col for col, path in raw_cols}
             cols_by_alias = {
                 alias: cols_by_canonical_path[col.canonical_path]
                 for alias, col in columns.items()
@@ -290,20 +335,24 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
                 .filter(models.LocalityRef.path.in_(full_fips))
             )
             loc_ids_by_fips = {loc.path: loc.loc_id for loc in loc_ids}
+            loc_id_list = list(loc_ids_by_fips.values())
 
             # ...but first, deprecate all the old ones.
             ctx.db.execute(
                 update(models.GeoSetVersion)
                 .where(
                     models.GeoSetVersion.layer_id == layer_obj.layer_id,
-                    models.GeoSetVersion.loc_id.in_(loc.loc_id for loc in loc_ids),
+                    models.GeoSetVersion.loc_id.in_(loc_id_list),
                     models.GeoSetVersion.valid_to.is_(None),
                 )
                 .values(valid_to=now)
             )
 
-            geo_sets = ctx.db.scalars(
-                insert(models.GeoSetVersion).returning(models.GeoSetVersion),
+            geo_set_table = models.GeoSetVersion.__table__
+            geo_sets = ctx.conn.execute(
+                insert(geo_set_table).returning(
+                    geo_set_table.c.loc_id, geo_set_table.c.set_version_id
+                ),
                 [
                     {
                         "layer_id": layer_obj.layer_id,
@@ -311,7 +360,7 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
                         "valid_from": now,
                         "meta_id": ctx.meta.meta_id,
                     }
-                    for loc_id in loc_ids_by_fips.values()
+                    for loc_id in loc_id_list
                 ],
             )
             loc_id_to_set_id = {
@@ -337,7 +386,7 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
                             "geo_id": geos_by_path[geo_path].geo_id,
                         }
                     )
-            ctx.db.execute(insert(models.GeoSetMember), set_members)
+            ctx.conn.execute(insert(models.GeoSetMember.__table__), set_members)
     else:
         log.info("Importing geographies via API...")
         with db.context(notes=import_notes) as ctx:
@@ -350,11 +399,21 @@ def load_geo(fips: str, level: str, year: str, namespace: str):
                 layer=layer,
             )
 
-            for county_fips, county_geos in geos_by_county.items():
-                full_fips = fips + county_fips
-                ctx.geo_layers.map_locality(
-                    layer=layer, locality=full_fips, geographies=county_geos
-                )
+            # Each county mapping is an independent request, so a few can be
+            # issued at a time if `MAP_LOCALITY_WORKERS` is raised (the client
+            # is blocking, but network I/O releases the GIL).
+            with ThreadPoolExecutor(max_workers=MAP_LOCALITY_WORKERS) as executor:
+                futures = [
+                    executor.submit(
+                        ctx.geo_layers.map_locality,
+                        layer=layer,
+                        locality=fips + county_fips,
+                        geographies=county_geos,
+                    )
+                    for county_fips, county_geos in geos_by_county.items()
+                ]
+                for future in futures:
+                    future.result()
 
 
 if __name__ == "__main__":
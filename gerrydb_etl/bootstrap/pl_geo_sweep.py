@@ -0,0 +1,122 @@
+"""Imports base Census geographies for many states, levels, and years in parallel."""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import click
+from gerrydb_etl import config_logger
+from gerrydb_etl.bootstrap.pl_config import LEVELS
+from gerrydb_etl.bootstrap.pl_geo import import_geo
+
+log = logging.getLogger()
+
+# Levels imported per state by `pl_geo.sh`, in the same order.
+SWEEP_LEVELS = ("county", "tract", "bg", "vtd", "place", "cousub", "block")
+SWEEP_YEARS = ("2010", "2020")
+
+# Each worker holds its own database connection (in bulk import mode) and
+# GerryDB client, so keep this within the database's connection limit.
+MAX_WORKERS = min(os.cpu_count() or 1, 16)
+
+# The GerryDB client reads its configuration from (and keeps its on-disk
+# cache under) `GERRYDB_ROOT`.
+GERRYDB_ROOT = Path(os.getenv("GERRYDB_ROOT", Path.home() / ".gerrydb"))
+
+
+def init_worker(worker_roots_dir: str) -> None:
+    """Sets up logging and a private GerryDB client root in a worker process.
+
+    Each worker gets its own copy of the client configuration, so that
+    workers' clients never read and write the same on-disk cache.
+    """
+    config_logger(log)
+    worker_root = Path(tempfile.mkdtemp(dir=worker_roots_dir))
+    config_path = GERRYDB_ROOT / "config"
+    if config_path.exists():
+        shutil.copy(config_path, worker_root / "config")
+    os.environ["GERRYDB_ROOT"] = str(worker_root)
+
+
+@click.command()
+@click.option(
+    "--fips",
+    "fips_codes",
+    help="State/territory FIPS code (repeatable).",
+    multiple=True,
+    required=True,
+)
+@click.option(
+    "--level",
+    "levels",
+    type=click.Choice(LEVELS),
+    multiple=True,
+    default=SWEEP_LEVELS,
+    show_default=True,
+)
+@click.option(
+    "--year",
+    "years",
+    type=click.Choice(["2010", "2020"]),
+    multiple=True,
+    default=SWEEP_YEARS,
+    show_default=True,
+)
+@click.option(
+    "--namespace",
+    default="census.{year}",
+    show_default=True,
+    help="Namespace for each import; `{year}` is replaced with the Census year.",
+)
+@click.option("--workers", type=int, default=MAX_WORKERS, show_default=True)
+def load_geo_sweep(
+    fips_codes: tuple[str, ...],
+    levels: tuple[str, ...],
+    years: tuple[str, ...],
+    namespace: str,
+    workers: int,
+):
+    """Imports base Census geographies for every (FIPS, level, year) combination.
+
+    Each combination is an independent import (and transaction), run in a pool
+    of worker processes. Preconditions are the same as for `pl_geo`.
+    """
+    jobs = [
+        (fips, level, year, namespace.format(year=year))
+        for fips in fips_codes
+        for year in years
+        for level in levels
+    ]
+    # Workers are spawned rather than forked so they don't inherit
+    # the parent's client connection pools.
+    with tempfile.TemporaryDirectory(prefix="gerrydb-sweep-") as worker_roots_dir:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(worker_roots_dir,),
+        ) as executor:
+            futures = {executor.submit(import_geo, *job): job for job in jobs}
+
+    failed_jobs = []
+    for future, (fips, level, year, _) in futures.items():
+        try:
+            future.result()
+        except Exception as ex:
+            log.error(
+                "Failed to import %s %s level (FIPS %s): %s", year, level, fips, ex
+            )
+            failed_jobs.append((fips, level, year))
+
+    log.info("Imported %d of %d datasets.", len(jobs) - len(failed_jobs), len(jobs))
+    if failed_jobs:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    config_logger(log)
+    load_geo_sweep()
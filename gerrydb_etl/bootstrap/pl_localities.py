@@ -1,19 +1,26 @@
 """Imports localities for states, territories, and counties/county equivalents."""
 
+import asyncio
+import json
 import logging
 import warnings
-from collections import Counter
 
 import click
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import us  # package with tons of state metadata
 
 from gerrydb import GerryDB
 from gerrydb.exceptions import ResultError
 from gerrydb.schemas import LocalityCreate
-from gerrydb_etl import config_logger, download_dataframe_with_hash, pathify
-from utm import from_latlon
+from gerrydb_etl import (
+    DOWNLOAD_CACHE_DIR,
+    config_logger,
+    download_dataframes_with_hash_async,
+    pathify,
+    read_dataframe,
+)
 
 log = logging.getLogger()
 
@@ -32,6 +39,18 @@ COUNTY_NOTES = (
     f"and the 2020 U.S. Census counties shapefile ({COUNTY_2020_URL})"
 )
 
+# Counties in the 2010 shapefile but not the 2020 shapefile, cached alongside
+# the source shapefiles' URLs and the 2010 shapefile's hash.
+LEGACY_COUNTIES_CACHE_PATH = DOWNLOAD_CACHE_DIR / "legacy_counties_2010.gpkg"
+LEGACY_COUNTIES_META_PATH = DOWNLOAD_CACHE_DIR / "legacy_counties_2010.json"
+
+# The only county attributes we use (besides geometry). 2010 column names
+# have a `10` suffix.
+COUNTY_COLUMNS = ("GEOID", "STATEFP", "NAME", "NAMELSAD")
+
+# Log progress in row-wise loops every `LOG_INTERVAL` rows.
+LOG_INTERVAL = 256
+
 # For disambiguation.
 # Most overrides are in Virginia, which has many independent cities that share
 # names (as defined by the `NAME` column in the counties shapefile) with counties.
@@ -78,36 +97,50 @@ ALIAS_OVERRIDES = {
 
 
 # utm is Universal Transverse Mercator, it's one of 60 zones used for projections
-def utm_of_point(point):
-    """Returns the UTM zone of a lat-long point."""
-    return from_latlon(point.y, point.x)[2]
+def utm_zones(df) -> np.ndarray:
+    """Returns the UTM zone of each centroid in a lat-long `GeoDataFrame`."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        longitudes = df["geometry"].centroid.x.to_numpy()
+    # Zones are 6° bands of longitude numbered eastward from 180°W. The Norway and
+    # Svalbard exceptions handled by `utm.from_latlon` don't apply to Census areas.
+    zones = np.floor((longitudes + 180) / 6).astype(int) + 1
+    return np.clip(zones, 1, 60)
+
 
+def modal_utm_zone(zones) -> int:
+    """Returns the most common of an array of UTM zones.
 
-def identify_utm_zone(df):
-    """Identifies the modal UTM zone of a `GeoDataFrame` in lat-long coordinates."""
+    Ties go to the zone that appears first, as with `Counter.most_common`.
+    """
     # borrowed from gerrychain.graph.geo
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", category=UserWarning)
-        utm_counts = Counter(utm_of_point(point) for point in df["geometry"].centroid)
-    return utm_counts.most_common(1)[0][0]
+    unique_zones, first_seen, counts = np.unique(
+        zones, return_index=True, return_counts=True
+    )
+    modal = counts == counts.max()
+    return int(unique_zones[modal][first_seen[modal].argmin()])
 
 
 # EPSG European Petroleum Survey Group codes, used for identifying projection systems
+UTM_ZONE_TO_PROJ = {
+    # EPSG:26901 through EPSG:26920 are UTM projections appropriate
+    # for the continental U.S., Hawaii, and Alaska.
+    **{zone: f"epsg:269{zone:02d}" for zone in range(3, 21)},
+    # The only locality in UTM zone 2 covered by the decennial Census
+    # is American Samoa, which is also the only Census locality in
+    # the Southern Hemisphere.
+    2: "epsg:6636",  # NAD83(PA11) / UTM zone 2S
+    # Gaum and Northern Mariana Islands are in zone 55N.
+    55: "epsg:8693",  # NAD83(MA11) / UTM zone 55N
+}
+
+
 def utm_zone_proj(zone: int) -> str:
     """Returns an EPSG identifier for a zone-appropriate UTM projection."""
-    if 3 <= zone <= 20:
-        # EPSG:26901 through EPSG:26920 are UTM projections appropriate
-        # for the continental U.S., Hawaii, and Alaska.
-        return f"epsg:269{str(zone).zfill(2)}"
-    if zone == 2:
-        # The only locality in UTM zone 2 covered by the decennial Census
-        # is American Samoa, which is also the only Census locality in
-        # the Southern Hemisphere.
-        return "epsg:6636"  # NAD83(PA11) / UTM zone 2S
-    if zone == 55:
-        # Gaum and Northern Mariana Islands are in zone 55N.
-        return "epsg:8693"  # NAD83(MA11) / UTM zone 55N
-    raise ValueError("Zone not covered by the U.S. Census.")
+    try:
+        return UTM_ZONE_TO_PROJ[zone]
+    except KeyError:
+        raise ValueError("Zone not covered by the U.S. Census.") from None
 
 
 # click is a library designed to create CLI (command line interface) programs
@@ -119,35 +152,84 @@ def utm_zone_proj(zone: int) -> str:
     flag_value=True,
     help="Handle 'path already exists' errors.",
 )
-def load_localities(suppress_existence: bool):
+@click.option(
+    "--refresh-legacy",
+    is_flag=True,
+    help="Rebuild the cached legacy (2010-only) counties from the 2010 shapefile.",
+)
+def load_localities(suppress_existence: bool, refresh_legacy: bool):
     """Imports localities for states, territories, and counties/county equivalents."""
 
     # creates a gerrydb instance, which sets up communication between docker container DB and uvicorn web server
     db = GerryDB()
 
-    # Returns a (Geo)DataFrame and a file hash from a downloaded file
-    counties_gdf, counties_hash = download_dataframe_with_hash(COUNTY_2020_URL)
-
     # Cross-vintage compatibility: prefer 2020 data, but add legacy counties
-    # that were eliminated between 2010 and 2020.
-    # Returns a (Geo)DataFrame and a file hash from a downloaded file
-    counties_2010_gdf, counties_2010_hash = download_dataframe_with_hash(
-        COUNTY_2010_URL
-    )
-
-    # remove 10 from the end of each column name
-    counties_2010_gdf = counties_2010_gdf.rename(
-        columns={
-            col: col[:-2] if col.endswith("10") else col
-            for col in counties_2010_gdf.columns
-        }
+    # that were eliminated between 2010 and 2020. These never change, so
+    # they are cached after the first run; the 2010 shapefile is only needed
+    # to (re)build that cache, which is also rebuilt if either source URL
+    # changes.
+    legacy_meta = None
+    if (
+        not refresh_legacy
+        and LEGACY_COUNTIES_CACHE_PATH.exists()
+        and LEGACY_COUNTIES_META_PATH.exists()
+    ):
+        with open(LEGACY_COUNTIES_META_PATH) as meta_fp:
+            legacy_meta = json.load(meta_fp)
+    legacy_cached = legacy_meta is not None and (
+        legacy_meta.get("2010_url"),
+        legacy_meta.get("2020_url"),
+    ) == (COUNTY_2010_URL, COUNTY_2020_URL)
+    county_urls = [COUNTY_2020_URL]
+    if not legacy_cached:
+        county_urls.append(COUNTY_2010_URL)
+
+    # Shapefiles are downloaded concurrently; each download returns
+    # a (Geo)DataFrame and a file hash. The archives never change, so they
+    # are cached on disk across runs.
+    county_downloads = asyncio.run(
+        download_dataframes_with_hash_async(
+            county_urls,
+            # (Columns missing from a particular vintage are ignored by the reader.)
+            columns=[*COUNTY_COLUMNS, *(f"{col}10" for col in COUNTY_COLUMNS)],
+            cache=True,
+        )
     )
+    counties_gdf, counties_hash = county_downloads[0]
+    counties_hash = counties_hash.hexdigest()
+
+    if legacy_cached:
+        log.info("Using cached legacy counties (%s)", LEGACY_COUNTIES_CACHE_PATH)
+        legacy_counties_gdf = read_dataframe(str(LEGACY_COUNTIES_CACHE_PATH))
+        counties_2010_hash = legacy_meta["2010_sha256"]
+    else:
+        counties_2010_gdf, counties_2010_hash = county_downloads[1]
+        counties_2010_hash = counties_2010_hash.hexdigest()
+
+        # remove 10 from the end of each column name
+        counties_2010_gdf = counties_2010_gdf.rename(
+            columns=lambda col: col[:-2] if col.endswith("10") else col
+        )
 
-    # counties removed between 2010 and 2020 census
-    legacy_counties = set(counties_2010_gdf["GEOID"]) - set(counties_gdf["GEOID"])
-    legacy_counties_gdf = counties_2010_gdf[
-        counties_2010_gdf["GEOID"].isin(legacy_counties)
-    ]
+        # counties removed between 2010 and 2020 census
+        # (only the columns shared with the 2020 data are kept)
+        legacy_counties_gdf = counties_2010_gdf.loc[
+            ~counties_2010_gdf["GEOID"].isin(counties_gdf["GEOID"]),
+            counties_gdf.columns.intersection(counties_2010_gdf.columns),
+        ]
+
+        # The metadata is written last, so a partially written cache is rebuilt.
+        LEGACY_COUNTIES_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        legacy_counties_gdf.to_file(LEGACY_COUNTIES_CACHE_PATH, driver="GPKG")
+        with open(LEGACY_COUNTIES_META_PATH, "w") as meta_fp:
+            json.dump(
+                {
+                    "2010_url": COUNTY_2010_URL,
+                    "2020_url": COUNTY_2020_URL,
+                    "2010_sha256": counties_2010_hash,
+                },
+                meta_fp,
+            )
 
     # create new geodataframe that includes 2020 and legacy counties
     # TODO concat is being deprecated
@@ -155,10 +237,24 @@ def load_localities(suppress_existence: bool):
         pd.concat([counties_gdf, legacy_counties_gdf], ignore_index=True),
         crs=counties_gdf.crs,
     )
+    # Release the source frames (including the full 2010 shapefile, if it was
+    # downloaded) before the geometry-heavy work below.
+    del county_downloads, legacy_counties_gdf
+    if not legacy_cached:
+        del counties_2010_gdf
+    # There are only a few dozen states/territories, so the state-level
+    # lookups and comparisons below can work on categorical codes.
+    counties_gdf["STATEFP"] = counties_gdf["STATEFP"].astype("category")
 
     # list of states, territories, and DC
     state_like = us.STATES_AND_TERRITORIES + [us.states.lookup("DC")]
 
+    # identifies each state's modal utm zone (locality could cross several)
+    # in one grouped pass over the county zones
+    counties_gdf["utm_zone"] = utm_zones(counties_gdf)
+    state_zones = counties_gdf.groupby("STATEFP", observed=True)["utm_zone"]
+    state_fips_to_zone = state_zones.agg(lambda zones: modal_utm_zone(zones.to_numpy()))
+
     # add state, territory, DC, and USA localities
     # ctx is a WriteContext object, which stores all sorts of meta data about our transaction
     with db.context(notes=STATE_NOTES) as ctx:
@@ -188,11 +284,7 @@ def load_localities(suppress_existence: bool):
         for state in state_like:
             log.info("Creating locality for state/territory %s...", state.name)
 
-            # access all counties in state
-            state_gdf = counties_gdf[counties_gdf["STATEFP"] == state.fips]
-
-            # identifies modal utm zone (locality could cross several)
-            zone = identify_utm_zone(state_gdf)
+            zone = state_fips_to_zone[state.fips]
 
             # LocalityCreate stores info about the locality (but notably not the underlying geography!)
             state_like_locs.append(
@@ -219,17 +311,33 @@ def load_localities(suppress_existence: bool):
     # us module has these built in under mapping method, but parker
     # is being intentional about DC
     state_fips_to_name = {state.fips: state.name for state in state_like}
-    state_fips_to_abbr = {state.fips: state.abbr for state in state_like}
-
-    # create a version of the dataframe without DC
-    counties_gdf = counties_gdf[counties_gdf.STATEFP != "11"].copy()  # drop DC
+    # paths only depend on the state, so normalize each one once
+    state_fips_to_path = {state.fips: pathify(state.name) for state in state_like}
+    state_fips_to_abbr_path = {state.fips: pathify(state.abbr) for state in state_like}
 
     # add new columns
     counties_gdf["state_name"] = counties_gdf["STATEFP"].map(state_fips_to_name)
-    counties_gdf["state_abbr"] = counties_gdf["STATEFP"].map(state_fips_to_abbr)
-    counties_gdf["full_name"] = (
-        counties_gdf["NAMELSAD"] + ", " + counties_gdf["state_name"]
+    counties_gdf["state_path"] = counties_gdf["STATEFP"].map(state_fips_to_path)
+    counties_gdf["state_abbr_path"] = counties_gdf["STATEFP"].map(
+        state_fips_to_abbr_path
     )
+    counties_gdf["full_name"] = counties_gdf["NAMELSAD"].str.cat(
+        counties_gdf["state_name"], sep=", "
+    )
+    counties_gdf["default_proj"] = counties_gdf["utm_zone"].map(utm_zone_proj)
+    # paths default to `<state>/<county name>`, except where disambiguated
+    name_paths = counties_gdf["NAME"].map(pathify)
+    counties_gdf["canonical_path"] = (
+        counties_gdf["GEOID"]
+        .map(CANONICAL_PATH_OVERRIDES)
+        .fillna(counties_gdf["state_path"].str.cat(name_paths, sep="/"))
+    )
+    counties_gdf["abbr_path"] = counties_gdf["state_abbr_path"].str.cat(
+        name_paths, sep="/"
+    )
+    # Drop DC. The new columns are assigned before filtering, so the filtered
+    # frame doesn't need a defensive `.copy()`.
+    counties_gdf = counties_gdf[counties_gdf.STATEFP != "11"]
     counties_gdf = counties_gdf.sort_values(by=["GEOID"])
 
     # create context object to store meta data of transaction
@@ -238,35 +346,48 @@ def load_localities(suppress_existence: bool):
     with db.context(
         notes=(
             COUNTY_NOTES
-            + f" (2010 SHA256: {counties_2010_hash.hexdigest()}, "
-            + f"2020 SHA256: {counties_hash.hexdigest()})"
+            + f" (2010 SHA256: {counties_2010_hash}, "
+            + f"2020 SHA256: {counties_hash})"
         )
     ) as ctx:
         county_locs = []
-        for row in counties_gdf.itertuples():
-            log.info("Creating locality for %s...", row.full_name)
-            zone = utm_of_point(row.geometry.centroid)
+        county_columns = zip(
+            counties_gdf["GEOID"].to_numpy(),
+            counties_gdf["full_name"].to_numpy(),
+            counties_gdf["canonical_path"].to_numpy(),
+            counties_gdf["abbr_path"].to_numpy(),
+            counties_gdf["state_path"].to_numpy(),
+            counties_gdf["default_proj"].to_numpy(),
+        )
+        for idx, (
+            geoid,
+            full_name,
+            canonical_path,
+            abbr_path,
+            state_path,
+            default_proj,
+        ) in enumerate(county_columns):
+            # log progress periodically rather than once per county
+            if idx % LOG_INTERVAL == 0:
+                log.info(
+                    "Creating locality for %s (%d/%d)...",
+                    full_name,
+                    idx + 1,
+                    len(counties_gdf),
+                )
 
             # if the row is in the override dict, use override value
-            # else use f"{pathify(row.state_name)}/{pathify(row.NAME)}"
-            canonical_path = CANONICAL_PATH_OVERRIDES.get(
-                row.GEOID, f"{pathify(row.state_name)}/{pathify(row.NAME)}"
-            )
-            # if the row is in the override dict, use override value
-            # else use f"{pathify(row.state_abbr)}/{pathify(row.NAME)}"
-
+            # else use the `<state abbreviation>/<county name>` path;
             # adding the geoid and this path as aliases
-            aliases = ALIAS_OVERRIDES.get(
-                row.GEOID, [f"{pathify(row.state_abbr)}/{pathify(row.NAME)}"]
-            ) + [row.GEOID]
+            aliases = ALIAS_OVERRIDES.get(geoid, [abbr_path]) + [geoid]
 
             county_locs.append(
                 LocalityCreate(
                     canonical_path=canonical_path,
-                    parent_path=pathify(row.state_name),
-                    name=row.full_name,
+                    parent_path=state_path,
+                    name=full_name,
                     aliases=aliases,
-                    default_proj=utm_zone_proj(zone),
+                    default_proj=default_proj,
                 )
             )
 
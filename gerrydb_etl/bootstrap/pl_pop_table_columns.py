@@ -1,6 +1,9 @@
 """Creates columns for Census PL 94-171 tables P1 through P4."""
 
+import asyncio
 import logging
+import re
+from functools import lru_cache
 from typing import Optional
 
 import click
@@ -87,7 +90,14 @@ def parse_labels(variables: dict) -> dict[str, tuple[str, str, Optional[bool]]]:
     return mapped_labels
 
 
-def column_aliases(name: str) -> Optional[list[str]]:
+# Census column name formats (see `column_aliases`).
+COLUMN_NAME_2020_RE = re.compile(r"^P(\d)_(\d{3})N$")
+COLUMN_NAME_2010_RE = re.compile(r"^P00(\d)(\d{3})$")
+COLUMN_NAME_2010_LONG_RE = re.compile(r"^P00(\d)0(\d{3})$")
+
+
+@lru_cache(maxsize=None)
+def column_aliases(name: str) -> Optional[tuple[str, str, str]]:
     """Standardizes equivalent Census column names across formats/vintages.
 
     The 2010 PL 94-171 release uses the column name format Pxxxyyy (e.g. `P001001`),
@@ -101,21 +111,31 @@ def column_aliases(name: str) -> Optional[list[str]]:
         All three column name formats for `name`, assuming the format of `name`
         can be identified.
     """
-    if name.startswith("P") and name[2] == "_" and len(name) == 7:
-        table_id = name[1]
-        col_id = name[3:6]
-        return [name, f"P00{table_id}{col_id}", f"P00{table_id}0{col_id}"]
-    if name.startswith("P00") and len(name) == 7:
-        table_id = name[3]
-        col_id = name[4:]
-        return [f"P{table_id}_{col_id}N", name, f"P00{table_id}0{col_id}"]
-    if name.startswith("P00") and len(name) == 8:
-        table_id = name[3]
-        col_id = name[5:]
-        return [f"P{table_id}_{col_id}N", f"P00{table_id}{col_id}", name]
+    for pattern in (COLUMN_NAME_2020_RE, COLUMN_NAME_2010_RE, COLUMN_NAME_2010_LONG_RE):
+        match = pattern.match(name)
+        if match:
+            table_id, col_id = match.groups()
+            return (
+                f"P{table_id}_{col_id}N",
+                f"P00{table_id}{col_id}",
+                f"P00{table_id}0{col_id}",
+            )
     return None
 
 
+async def fetch_table_variables(table_urls: dict[str, str]) -> dict[str, dict]:
+    """Fetches Census variable metadata for several tables concurrently."""
+    async with httpx.AsyncClient(headers={"accept": "application/json"}) as client:
+        responses = await asyncio.gather(
+            *(client.get(table_url) for table_url in table_urls.values())
+        )
+    table_variables = {}
+    for table, response in zip(table_urls, responses):
+        response.raise_for_status()
+        table_variables[table] = response.json()["variables"]
+    return table_variables
+
+
 @click.command()
 @click.option("--namespace", required=True)
 @click.option("--year", required=True)
@@ -123,11 +143,7 @@ def create_columns(namespace: str, year: str):
     """Creates columns for Census tables P1 through P4."""
     base_url = SOURCE_URL.format(year=year)
     table_urls = {table: f"{base_url}/groups/{table}/" for table in TABLES}
-    table_variables = {}
-    for table, table_url in table_urls.items():
-        response = httpx.get(url=table_url, headers={"accept": "application/json"})
-        response.raise_for_status()
-        table_variables[table] = response.json()["variables"]
+    table_variables = asyncio.run(fetch_table_variables(table_urls))
 
     db = GerryDB(namespace=namespace)
 
@@ -162,7 +178,10 @@ def create_columns(namespace: str, year: str):
             ) in variables.items():
 
                 # if column is redundant
-                if census_name in REDUNDANT_COLUMN_TO_CANONICAL_COLUMN:
+                canonical_census_name = REDUNDANT_COLUMN_TO_CANONICAL_COLUMN.get(
+                    census_name
+                )
+                if canonical_census_name is not None:
                     log.info("Skipping column %s (redundant)...", census_name)
                     # use the column that corresponds to redundant
                     table_cols.append(redundant_columns[census_name])
@@ -190,53 +209,45 @@ def create_columns(namespace: str, year: str):
                 )
                 col_description = COL_DESCRIPTIONS[(table, col_is_hispanic)]
                 aliases = column_aliases(census_name)
-                if census_name in CANONICAL_COLUMN_TO_REDUNDANT_COLUMN:
-                    redundant_name = CANONICAL_COLUMN_TO_REDUNDANT_COLUMN[census_name]
+                redundant_name = CANONICAL_COLUMN_TO_REDUNDANT_COLUMN.get(census_name)
+                if redundant_name is not None:
                     log.info(
                         "Adding additional aliases from redundant column %s...",
                         redundant_name,
                     )
                     aliases += column_aliases(redundant_name)
-                else:
-                    redundant_name = None
 
+                description = f"{year} U.S. Census {col_description}: " + demographic
                 try:
                     # try to create the column
                     log.debug(f"making the column {col_name.lower()}")
-                    log.debug(
-                        f"\tdescription: {year} U.S. Census {col_description}: {demographic}"
-                    )
+                    log.debug(f"\tdescription: {description}")
                     col = ctx.columns.create(
                         col_name.lower(),
                         aliases=[alias.lower() for alias in aliases],
                         column_kind="count",
                         column_type="int",
-                        description=(
-                            f"{year} U.S. Census {col_description}: " + demographic
-                        ),
+                        description=description,
                         source_url=table_urls[table],
                     )
-                    table_cols.append(col)
-                    if redundant_name is not None:
-                        redundant_columns[redundant_name] = col
-
                 except ResultError as e:
-
                     # if the column already exists, get the column from the database
                     if "Failed to create column" in e.args[0]:
-                        # get col from database
-                        col = ctx.columns.get(col_name.lower())
-
                         log.info(
                             f"Failed to create {col_name} column, already in namespace {namespace}"
                         )
                         log.info("Using existing column")
-                        table_cols.append(col)
-                        if redundant_name is not None:
-                            redundant_columns[redundant_name] = col
+                        col = ctx.columns.get(col_name.lower())
                     else:
                         raise e
 
+                table_cols.append(col)
+                if redundant_name is not None:
+                    redundant_columns[redundant_name] = col
+
+            log.info(
+                "Created or found %d columns for Table %s.", len(table_cols), table
+            )
             log.info("Creating column set for Table %s...", table)
             try:
                 ctx.column_sets.create(
@@ -1,12 +1,16 @@
 """Loads Census PL 94-171 tables P1 through P4 from the Census API."""
 
+import atexit
 import logging
+import operator
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, reduce
 
 import click
 import httpx
+import numpy as np
 import pandas as pd
-import sys
 from gerrydb import GerryDB
 from gerrydb_etl import config_logger
 from gerrydb_etl.bootstrap.pl_config import (
@@ -17,9 +21,10 @@ from gerrydb_etl.bootstrap.pl_config import (
 )
 
 try:
-    from gerrydb_etl.db import DirectTransactionContext
+    from gerrydb_etl.db import DirectTransactionContext, chunked
     from gerrydb_meta import crud, models
-    from sqlalchemy import select
+    from sqlalchemy import Engine
+    from sqlalchemy.orm import Session
 except ImportError:
     crud = None
 
@@ -43,6 +48,41 @@ AUXILIARY_LEVELS = (
 )
 LEVELS = CENTRAL_SPINE_LEVELS + AUXILIARY_LEVELS
 
+# Number of geography paths looked up per query in bulk import mode.
+GET_BULK_CHUNK_SIZE = 50_000
+
+
+@lru_cache(maxsize=None)
+def _client() -> httpx.Client:
+    """Returns the client shared by Census API requests.
+
+    Requests share one connection pool, and the transport retries failed
+    connection attempts. Large (block-level) responses can take minutes to
+    arrive, so reads are not timed out. The client is only created on first
+    use, so importing this module doesn't open one.
+    """
+    client = httpx.Client(transport=httpx.HTTPTransport(retries=3), timeout=None)
+    atexit.register(client.close)
+    return client
+
+
+def _get_geographies(engine: "Engine", namespace: str, paths) -> list:
+    """Looks up geographies by path in their own (read-only) session.
+
+    Geographies are looked up in bounded chunks rather than with one enormous
+    IN clause. The returned geographies are detached from the session.
+    """
+    geographies = []
+    with Session(engine) as db:
+        for paths_chunk in chunked(paths, GET_BULK_CHUNK_SIZE):
+            geographies.extend(
+                crud.geography.get_bulk(
+                    db=db,
+                    namespaced_paths=[(namespace, path) for path in paths_chunk],
+                )
+            )
+    return geographies
+
 
 @click.command()
 @click.option("--namespace", required=True)
@@ -120,63 +160,72 @@ def load_tables(namespace: str, year: str, table: str, level: str, fips: str):
 
     request_url = SOURCE_URL.format(year=year)
 
-    log.info(f"Sending request to {request_url} ...", flush=True)
+    log.info(f"Sending request to {request_url} ...")
     try_count = 0
     while try_count < 5 and not response_complete:
         try_count += 1
         try:
-            response = httpx.get(
-                url=request_url,
-                params={**base_params, **query},
-                timeout=None,
-            )
+            response = _client().get(url=request_url, params={**base_params, **query})
             log.info(f"Got response from url {response.request.url} ...")
             response_complete = True
 
         except Exception as e:
             if try_count < 3:
-                log.info(
-                    f"\tIssue in {fips}. Retrying {try_count} ...",
-                    file=sys.stderr,
-                    flush=True,
-                )
+                log.info(f"\tIssue in {fips}. Retrying {try_count} ...")
             else:
                 log.error(
-                    f"ERROR in {fips}. Failed to get response from url {request_url}. Found error {e}.",
-                    file=sys.stderr,
-                    flush=True,
+                    f"ERROR in {fips}. Failed to get response from url {request_url}. Found error {e}."
                 )
 
     response.raise_for_status()
 
+    # The response is a header row followed by data rows, all strings.
+    # Build each column directly with its final type: count columns are
+    # parsed straight to integers rather than going through an object column,
+    # then downcast to the narrowest integer type that holds them (PL counts
+    # typically fit in 16 or 32 bits).
     rows = response.json()
-    table_df = pd.DataFrame.from_records(rows[1:], columns=rows[0])
-
-    # Some geographies have a '/' in the geoid, which will mess up the path, so we remove it
-    # and replace all instances of '/' with '--' in the dataframe
-    table_df = table_df.applymap(
-        lambda x: x.replace("/", "--") if isinstance(x, str) else x
+    # Release the raw body (which can be hundreds of megabytes for block-level
+    # requests) before the columns are built from the parsed rows.
+    del response
+    header = [col.lower() for col in rows[0]]
+    column_values = list(zip(*rows[1:])) or [()] * len(header)
+    del rows
+    table_df = pd.DataFrame(
+        {
+            col: (
+                pd.to_numeric(np.asarray(values).astype(np.int64), downcast="integer")
+                if col in col_aliases
+                else np.asarray(values, dtype=object)
+            )
+            for col, values in zip(header, column_values)
+        }
     )
+    del column_values
 
-    table_df["id"] = table_df[list(id_cols)].agg("".join, axis=1)
+    # Some geographies have a '/' in the geoid, which will mess up the path, so we
+    # replace all instances of '/' with '--' in the ID columns (which are the only
+    # columns used in paths)
+    for col in id_cols:
+        table_df[col] = table_df[col].str.replace("/", "--", regex=False)
+
+    # Element-wise concatenation of the ID parts, without a Python call per row.
+    table_df["id"] = reduce(
+        operator.add, (table_df[col].to_numpy(dtype=object) for col in id_cols)
+    )
 
     if level in AUXILIARY_LEVELS:
         # since aiannh geographies cross state lines, the census subidivides the polygon but
         # uses the same geoid, we add the fips code to make the geoid unique
-        table_df["id"] = (
-            f"{level}:" + table_df["id"] + f":fips{fips}"
-            if level == "aiannh"
-            else f"{level}:" + table_df["id"]
-        )
+        prefix = f"{level}:"
+        suffix = f":fips{fips}" if level == "aiannh" else ""
+        table_df["id"] = prefix + table_df["id"] + suffix
 
-    table_df = table_df.rename(columns={col: col.lower() for col in table_df.columns})
     table_df = table_df.set_index("id")
 
     table_cols = {
         alias: col for alias, col in col_aliases.items() if alias in table_df.columns
     }
-    for col in table_cols:
-        table_df[col] = table_df[col].astype(int)
 
     import_notes = (
         f"ETL script {__file__}: loading data for {year} "
@@ -187,43 +236,55 @@ def load_tables(namespace: str, year: str, table: str, level: str, fips: str):
         log.info(
             "Importing column data via bulk import mode (direct database access)..."
         )
-        with DirectTransactionContext(notes=import_notes) as ctx:
+        with (
+            DirectTransactionContext(notes=import_notes) as ctx,
+            ThreadPoolExecutor(max_workers=1) as executor,
+        ):
+            # The geography lookup is by far the slowest query, so it runs in a
+            # separate session while the namespace and columns are fetched.
+            geographies_future = executor.submit(
+                _get_geographies, ctx.db.get_bind(), namespace, table_df.index
+            )
+
             namespace_obj = crud.namespace.get(db=ctx.db, path=namespace)
             assert namespace_obj is not None
 
-            geographies = crud.geography.get_bulk(
-                db=ctx.db,
-                namespaced_paths=[(namespace, idx) for idx in table_df.index],
-            )
-            if len(geographies) < len(table_df):
-                raise ValueError(
-                    f"Cannot perform bulk import (expected {len(table_df)} "
-                    f"geographies, found {len(geographies)})."
-                )
-
+            # Join each column to its canonical reference in one query (rather
+            # than filtering on a subquery), selecting the path directly to
+            # avoid a lazy load of `canonical_ref` per column.
             raw_cols = (
-                ctx.db.query(models.DataColumn)
+                ctx.db.query(models.DataColumn, models.ColumnRef.path)
+                .join(
+                    models.ColumnRef,
+                    models.ColumnRef.col_id == models.DataColumn.col_id,
+                )
                 .filter(
-                    models.DataColumn.col_id.in_(
-                        select(models.ColumnRef.col_id).filter(
-                            models.ColumnRef.path.in_(
-                                col.path for col in table_cols.values()
-                            ),
-                            models.ColumnRef.namespace_id == namespace_obj.namespace_id,
-                        )
-                    )
+                    models.ColumnRef.path.in_(
+                        [col.canonical_path for col in table_cols.values()]
+                    ),
+                    models.ColumnRef.namespace_id == namespace_obj.namespace_id,
                 )
                 .all()
             )
-            cols_by_canonical_path = {col.canonical_ref.path: col for col in raw_cols}
+            cols_by_canonical_path = {path: col for col, path in raw_cols}
             cols_by_alias = {
                 alias: cols_by_canonical_path[col.canonical_path]
                 for alias, col in table_cols.items()
             }
+
+            geographies = geographies_future.result()
+            if len(geographies) < len(table_df):
+                raise ValueError(
+                    f"Cannot perform bulk import (expected {len(table_df)} "
+                    f"geographies, found {len(geographies)})."
+                )
             geos_by_path = {geo.path: geo for geo in geographies}
             ctx.load_column_values(cols=cols_by_alias, geos=geos_by_path, df=table_df)
     else:
         log.info("Importing column data via API...")
+        # The API client has only been used with 64-bit counts, so widen the
+        # downcast columns back before handing them over.
+        table_df = table_df.astype({col: np.int64 for col in table_cols})
         with db.context(notes=import_notes) as ctx:
             ctx.load_dataframe(table_df, table_cols)
 
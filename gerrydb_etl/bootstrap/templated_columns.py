@@ -3,14 +3,18 @@ import logging
 from pathlib import Path
 
 import click
-import yaml
 from gerrydb import GerryDB
-from gerrydb_etl import TabularConfig, config_logger
-from jinja2 import Template
+from gerrydb_etl import config_logger, load_tabular_config
 from gerrydb.exceptions import ResultError
 log = logging.getLogger()
 
 
+def normalize_path(path: str) -> str:
+    """Normalizes a column path the way the server does when resolving it."""
+    # Paths are case-insensitive, and empty segments are ignored.
+    return "/".join(segment for segment in path.strip().lower().split("/") if segment)
+
+
 @click.command(
     context_settings={
         "ignore_unknown_options": True,
@@ -31,19 +35,33 @@ def create_columns(ctx, template_path: Path, namespace: str):
     template_args = {
         ctx.args[idx][2:]: ctx.args[idx + 1] for idx in range(0, len(ctx.args), 2)
     }
-    with open(template_path) as config_fp:
-        config_template = Template(config_fp.read())
-    rendered_config = config_template.render(**template_args)
-    config = TabularConfig(**yaml.safe_load(rendered_config))
+    config = load_tabular_config(template_path, **template_args)
 
     db = GerryDB(namespace=namespace)
+    # Skip columns that already exist (under their canonical path or an alias),
+    # rather than attempting to create them and matching on the error message.
+    existing_paths = set()
+    for col in db.columns.all():
+        existing_paths.add(normalize_path(col.canonical_path))
+        existing_paths.update(normalize_path(alias) for alias in col.aliases)
+    new_columns = [
+        col
+        for col in config.columns
+        if normalize_path(col.target) not in existing_paths
+    ]
+    log.info(
+        "Skipping %d columns already in namespace %s.",
+        len(config.columns) - len(new_columns),
+        namespace,
+    )
+
     with db.context(
         notes=(
             f"ETL script {__file__}: creating columns from "
             f"template {template_path.parts[-1]}"
         )
     ) as ctx:
-        for col in config.columns:
+        for col in new_columns:
             log.info("Creating column %s in namespace %s...", col.target, namespace)
             try:
                 ctx.columns.create(
@@ -55,10 +73,19 @@ def create_columns(ctx, template_path: Path, namespace: str):
                     source_url=config.source_url,
                 )
             except ResultError as e:
+                # Safety net for columns created since the existing columns
+                # were listed.
                 if "Failed to create column" in e.args[0]:
-                    print(f"Failed to create {col.target} column, already in namespace {namespace}")
+                    log.warning(
+                        "Failed to create %s column, already in namespace %s",
+                        col.target,
+                        namespace,
+                    )
                 else:
                     raise e
+        log.info(
+            "Processed %d columns in namespace %s.", len(new_columns), namespace
+        )
 
 if __name__ == "__main__":
     config_logger(log)
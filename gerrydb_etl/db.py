@@ -6,10 +6,12 @@ the avoidance of serialization/REST/caching overhead, and--more importantly--
 support for large-scale transactions.
 """
 
+import io
 import os
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Sequence
 
 import pandas as pd
 from gerrydb_meta.crud import obj_meta
@@ -17,13 +19,93 @@ from gerrydb_meta.crud.column import COLUMN_TYPE_TO_VALUE_COLUMN
 from gerrydb_meta.enums import ColumnType
 from gerrydb_meta.models import ColumnValue, DataColumn, Geography, ObjectMeta, User
 from gerrydb_meta.schemas import ObjectMetaCreate
-from sqlalchemy import create_engine, insert, update, tuple_
+from pandas.api.types import (
+    is_bool_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_string_dtype,
+)
+from sqlalchemy import (
+    Connection,
+    Engine,
+    create_engine,
+    insert,
+    make_url,
+    text,
+    update,
+)
 from sqlalchemy.orm import Session, sessionmaker
 
+# Per-type column value validation: (dtype check, expected value description).
+COLUMN_TYPE_TO_DTYPE_CHECK = {
+    ColumnType.BOOL: (is_bool_dtype, "boolean"),
+    ColumnType.FLOAT: (is_float_dtype, "integer or floating-point"),
+    ColumnType.INT: (is_integer_dtype, "integer"),
+    ColumnType.STR: (is_string_dtype, "string"),
+}
+
+# Rows per multi-row INSERT ... VALUES statement for executemany inserts.
+# (Column value rows have five parameters, so this stays well under
+# PostgreSQL's limit of 65,535 bind parameters per statement.)
+INSERT_PAGE_SIZE = 5_000
+
+# Rows per executemany call when loading column values, so that each call's
+# parameter set stays bounded no matter how many columns are loaded at once.
+INSERT_CHUNK_SIZE = int(os.getenv("GERRYDB_INSERT_CHUNK", "10000"))
+
+# Geographies per stale-value UPDATE, which keeps each statement's `IN` list
+# well under PostgreSQL's limit of 65,535 bind parameters.
+UPDATE_CHUNK_SIZE = 32_000
+
+# Escapes for PostgreSQL's `COPY` text format.
+COPY_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# User IDs by email, shared across transactions. (IDs rather than `User`
+# objects, which are bound to the session that loaded them.)
+_USER_ID_CACHE: dict[str, int] = {}
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yields successive lists of (at most) `size` items from an iterable."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def copy_text(value) -> str:
+    """Formats a value as a field in PostgreSQL's `COPY` text format."""
+    # Missing values (`None`, NaN, `pd.NA`, `pd.NaT`) are all NULL, as they
+    # would be in an INSERT.
+    if pd.isna(value):
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.translate(COPY_TEXT_ESCAPES)
+    return str(value)
+
+
+def create_bulk_engine(uri: str) -> Engine:
+    """Creates an engine tuned for large executemany INSERTs."""
+    engine_kwargs = {"insertmanyvalues_page_size": INSERT_PAGE_SIZE}
+    if make_url(uri).get_driver_name() == "psycopg2":
+        # Batch executemany statements that can't use multi-row VALUES, too.
+        engine_kwargs["executemany_mode"] = "values_plus_batch"
+        engine_kwargs["executemany_batch_page_size"] = 500
+    return create_engine(uri, **engine_kwargs)
+
 
 @dataclass
 class DirectTransactionContext:
-    """Context for a direct database transaction."""
+    """Context for a direct database transaction.
+
+    If `fresh_import` is set (or `GERRYDB_FRESH_IMPORT=true`), column values
+    are assumed to be loaded for the first time, and old versions of them are
+    not invalidated. This must only be used when loading into an empty
+    namespace.
+    """
 
     db: Optional[Session] = None
     dry_run: bool = False
@@ -31,18 +113,33 @@ class DirectTransactionContext:
     email: Optional[str] = None
     meta: Optional[ObjectMeta] = None
     user: Optional[User] = None
+    fresh_import: bool = False
 
     def __enter__(self) -> "DirectTransactionContext":
         """Creates a write context with metadata."""
         if self.db is None:
-            self.db = sessionmaker(create_engine(os.getenv("GERRYDB_DATABASE_URI")))()
+            self.db = sessionmaker(
+                create_bulk_engine(os.getenv("GERRYDB_DATABASE_URI"))
+            )()
         self.db.begin()
+        if (
+            os.getenv("GERRYDB_BULK_IMPORT")
+            and self.db.get_bind().dialect.name == "postgresql"
+        ):
+            # Bulk imports commit once at the end; a crash only loses the import
+            # itself (which is retried), so don't wait on WAL flushes.
+            self.db.execute(text("SET LOCAL synchronous_commit = OFF"))
 
         if self.email is None:
             self.email = os.getenv("GERRYDB_EMAIL")
 
         if self.user is None:
-            self.user = self.db.query(User).filter(User.email == self.email).first()
+            if self.email in _USER_ID_CACHE:
+                self.user = self.db.get(User, _USER_ID_CACHE[self.email])
+            else:
+                self.user = self.db.query(User).filter(User.email == self.email).first()
+                if self.user is not None:
+                    _USER_ID_CACHE[self.email] = self.user.user_id
 
         if self.meta is None:
             self.meta = obj_meta.create(
@@ -68,6 +165,15 @@ class DirectTransactionContext:
                 raise ex
         self.db.close()
 
+    @property
+    def conn(self) -> Connection:
+        """The Core connection for the session's current transaction.
+
+        Bulk writes go through this connection to skip ORM bookkeeping while
+        still committing or rolling back with the session.
+        """
+        return self.db.connection()
+
     def load_column_values(
         self,
         *,
@@ -77,71 +183,150 @@ class DirectTransactionContext:
     ) -> None:
         """Sets column values across geographies.
 
+        Column values are validated once per column against the column's type.
+
         Raises:
-            ColumnValueTypeError: If column types do not match expected types.
+            ValueError: If column types do not match expected types.
         """
         now = datetime.now(timezone.utc)
-        rows = []
+        meta_id = self.meta.meta_id
+        # Every column shares the DataFrame's index, so resolve geographies once.
+        df_geo_ids = [geos[geo_id].geo_id for geo_id in df.index]
+
+        # Validate all column data up front, before anything is written.
+        col_values = {}
+        validation_errors = []
         for col_name, col in cols.items():
-            # Validate column data.
-            val_column = COLUMN_TYPE_TO_VALUE_COLUMN[col.type]
-            validation_errors = []
             values = df[col_name]
-            for geo_id, value in values.items():
-                geo = geos[geo_id]
-                suffix = "column value for geography {geo.full_path}"
-                if col.type == ColumnType.FLOAT and isinstance(value, int):
-                    # Silently promote int -> float.
-                    value = float(value)
-                elif col.type == ColumnType.FLOAT and not isinstance(value, float):
+            if col.type == ColumnType.FLOAT and is_integer_dtype(values):
+                # Silently promote int -> float.
+                values = values.astype(float)
+            if col.type in COLUMN_TYPE_TO_DTYPE_CHECK:
+                dtype_check, expected = COLUMN_TYPE_TO_DTYPE_CHECK[col.type]
+                if not dtype_check(values):
                     validation_errors.append(
-                        f"Expected integer or floating-point {suffix}"
+                        f"Expected {expected} column values for column {col_name} "
+                        f"(found dtype {values.dtype})"
                     )
-                elif col.type == ColumnType.INT and not isinstance(value, int):
-                    validation_errors.append(f"Expected integer {suffix}")
-                elif col.type == ColumnType.STR and not isinstance(value, str):
-                    validation_errors.append(f"Expected string {suffix}")
-                elif col.type == ColumnType.BOOL and isinstance(value, bool):
-                    validation_errors.append(f"Expected boolean {suffix}")
-                rows.append(
-                    {
-                        "col_id": col.col_id,
-                        "geo_id": geo.geo_id,
-                        "meta_id": self.meta.meta_id,
-                        "valid_from": now,
-                        val_column: value,
-                    }
-                )
+                    continue
+            col_values[col_name] = values
 
         if validation_errors:
-            raise ValueError(errors=validation_errors)
+            raise ValueError("\n".join(validation_errors))
+
+        def column_value_rows(col: DataColumn, values: pd.Series):
+            val_column = COLUMN_TYPE_TO_VALUE_COLUMN[col.type]
+            # `tolist()` yields native Python scalars (which the DBAPI can
+            # adapt) without boxing each value through `Series.items()`.
+            values_list = values.tolist()
+            if values.hasnans:
+                # Missing values (e.g. NaN in a pandas string column) are
+                # NULL, as they are in `copy_text`.
+                values_list = [
+                    None if pd.isna(value) else value for value in values_list
+                ]
+            for geo_id, value in zip(df_geo_ids, values_list):
+                yield {
+                    "col_id": col.col_id,
+                    "geo_id": geo_id,
+                    "meta_id": meta_id,
+                    "valid_from": now,
+                    val_column: value,
+                }
 
         geo_ids = [geo.geo_id for geo in geos.values()]
         col_ids = [col.col_id for col in cols.values()]
-        stale_values = []
-
-        for col_id in col_ids:
-            result = (
-                self.db.query(ColumnValue.col_id, ColumnValue.geo_id)
-                .filter(
-                    ColumnValue.geo_id.in_(geo_ids),
-                    ColumnValue.col_id == col_id,
-                    ColumnValue.valid_to.is_(None),
-                )
-                .all()
-            )
-            stale_values.extend(result)
+
+        fresh_import = (
+            self.fresh_import or os.getenv("GERRYDB_FRESH_IMPORT", "").lower() == "true"
+        )
 
         with self.db.begin(nested=True):
-            # Optimization: most column values are only set once, so we don't
-            # need to invalidate old versions unless we previously detected them.
-            if stale_values:
-                stale_pairs = [(val.col_id, val.geo_id) for val in stale_values]
-                self.db.execute(
-                    update(ColumnValue)
-                    .where(
-                        tuple_(ColumnValue.col_id, ColumnValue.geo_id).in_(stale_pairs)
+            if not fresh_import:
+                # Invalidate old versions of the values being replaced with
+                # set-wise UPDATEs over batches of geographies. (Most column
+                # values are only set once, in which case these match no rows.)
+                for geo_ids_chunk in chunked(geo_ids, UPDATE_CHUNK_SIZE):
+                    self.db.execute(
+                        update(ColumnValue)
+                        .where(
+                            ColumnValue.col_id.in_(col_ids),
+                            ColumnValue.geo_id.in_(geo_ids_chunk),
+                            ColumnValue.valid_to.is_(None),
+                        )
+                        .values(valid_to=now)
                     )
-                    .values(valid_to=now)
-                )
-            self.db.execute(insert(ColumnValue), rows)
+            if self.supports_copy:
+                # Load with `COPY ... FROM STDIN` when the driver supports it
+                # (psycopg2), bypassing INSERT statement parsing entirely.
+                # Each column's values are copied straight from their arrays,
+                # without building a row dict per value.
+                for col_name, values in col_values.items():
+                    col = cols[col_name]
+                    self.copy_columns(
+                        ColumnValue,
+                        {
+                            "geo_id": df_geo_ids,
+                            COLUMN_TYPE_TO_VALUE_COLUMN[col.type]: values.tolist(),
+                        },
+                        constants={
+                            "col_id": col.col_id,
+                            "meta_id": meta_id,
+                            "valid_from": now,
+                        },
+                    )
+            else:
+                # Rows are generated as they are inserted, so at most one
+                # chunk of row dicts is held in memory at a time. A Core
+                # executemany needs the same keys in every row, so each
+                # column (with its own value column) is inserted separately.
+                for col_name, values in col_values.items():
+                    for chunk in chunked(
+                        column_value_rows(cols[col_name], values), INSERT_CHUNK_SIZE
+                    ):
+                        self.conn.execute(insert(ColumnValue.__table__), chunk)
+
+    @property
+    def supports_copy(self) -> bool:
+        """Whether the database driver supports `COPY ... FROM STDIN`."""
+        cursor = self.conn.connection.cursor()
+        try:
+            return hasattr(cursor, "copy_expert")
+        finally:
+            cursor.close()
+
+    def copy_columns(
+        self,
+        model,
+        columns: dict[str, Sequence],
+        constants: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Loads columnar data into a model's table with `COPY ... FROM STDIN`.
+
+        `columns` maps table columns to equal-length sequences of values;
+        `constants` maps table columns to a single value shared by every row,
+        which is only formatted once. The copy runs on the session's
+        connection, so it is part of the current transaction.
+        """
+        constants = constants or {}
+        keys = [*columns, *constants]
+        constants_text = "".join(
+            f"\t{copy_text(value)}" for value in constants.values()
+        )
+        fields = [[copy_text(value) for value in values] for values in columns.values()]
+
+        buf = io.StringIO()
+        buf.writelines(
+            "\t".join(row_fields) + constants_text + "\n" for row_fields in zip(*fields)
+        )
+        buf.seek(0)
+
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {model.__table__.fullname} ({', '.join(keys)}) "
+                "FROM STDIN WITH (FORMAT TEXT)",
+                buf,
+            )
+        finally:
+            cursor.close()
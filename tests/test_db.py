@@ -0,0 +1,153 @@
+"""Tests for direct database access helpers."""
+
+import io
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("gerrydb_meta")
+
+from gerrydb_etl.db import DirectTransactionContext, copy_text  # noqa: E402
+from gerrydb_meta.enums import ColumnType  # noqa: E402
+
+
+class FakeCursor:
+    """Records `COPY` statements and payloads."""
+
+    def __init__(self, copies: list):
+        self.copies = copies
+
+    def copy_expert(self, sql: str, buf: io.StringIO) -> None:
+        self.copies.append((sql, buf.read()))
+
+    def close(self) -> None:
+        pass
+
+
+class FakeInsertCursor:
+    """A cursor without `COPY` support."""
+
+    def close(self) -> None:
+        pass
+
+
+def fake_context(copies: list) -> DirectTransactionContext:
+    """Makes a transaction context whose connection records copies."""
+    dbapi_conn = SimpleNamespace(cursor=lambda: FakeCursor(copies))
+    session = SimpleNamespace(connection=lambda: SimpleNamespace(connection=dbapi_conn))
+    return DirectTransactionContext(db=session)
+
+
+def fake_insert_context(inserts: list) -> DirectTransactionContext:
+    """Makes a fresh-import transaction context that records INSERT batches."""
+    conn = SimpleNamespace(
+        connection=SimpleNamespace(cursor=FakeInsertCursor),
+        execute=lambda stmt, rows: inserts.append(rows),
+    )
+    session = SimpleNamespace(
+        connection=lambda: conn, begin=lambda nested: nullcontext()
+    )
+    return DirectTransactionContext(
+        db=session, meta=SimpleNamespace(meta_id=1), fresh_import=True
+    )
+
+
+@pytest.mark.parametrize("value", [None, float("nan"), np.nan, pd.NA, pd.NaT])
+def test_copy_text_missing_values_are_null(value):
+    assert copy_text(value) == "\\N"
+
+
+def test_copy_columns_writes_missing_values_as_null():
+    copies = []
+    model = SimpleNamespace(__table__=SimpleNamespace(fullname="column_value"))
+    valid_from = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    fake_context(copies).copy_columns(
+        model,
+        {
+            "geo_id": [1, 2, 3],
+            "val_float": pd.Series([1.5, np.nan, 2.0]).tolist(),
+            "val_str": pd.Series(["a\tb", None, pd.NA], dtype=object).tolist(),
+        },
+        constants={"col_id": 7, "valid_from": valid_from},
+    )
+
+    assert copies == [
+        (
+            "COPY column_value (geo_id, val_float, val_str, col_id, valid_from) "
+            "FROM STDIN WITH (FORMAT TEXT)",
+            "1\t1.5\ta\\tb\t7\t2020-01-01T00:00:00+00:00\n"
+            "2\t\\N\t\\N\t7\t2020-01-01T00:00:00+00:00\n"
+            "3\t2.0\t\\N\t7\t2020-01-01T00:00:00+00:00\n",
+        )
+    ]
+
+
+def test_load_column_values_inserts_each_column_separately():
+    inserts = []
+    fake_insert_context(inserts).load_column_values(
+        cols={
+            "name": SimpleNamespace(col_id=1, type=ColumnType.STR),
+            "pop": SimpleNamespace(col_id=2, type=ColumnType.INT),
+        },
+        geos={"a": SimpleNamespace(geo_id=10), "b": SimpleNamespace(geo_id=11)},
+        df=pd.DataFrame({"name": ["x", "y"], "pop": [1, 2]}, index=["a", "b"]),
+    )
+
+    # A Core executemany requires the same keys in every row of a batch.
+    assert len(inserts) == 2
+    for rows in inserts:
+        assert len({frozenset(row) for row in rows}) == 1
+    assert [row["val_str"] for row in inserts[0]] == ["x", "y"]
+    assert [(row["geo_id"], row["val_int"]) for row in inserts[1]] == [(10, 1), (11, 2)]
+
+
+@pytest.mark.parametrize("str_dtype", ["str", "string"])
+def test_load_column_values_inserts_missing_values_as_null(str_dtype):
+    inserts = []
+    fake_insert_context(inserts).load_column_values(
+        cols={
+            "name": SimpleNamespace(col_id=1, type=ColumnType.STR),
+            "area": SimpleNamespace(col_id=2, type=ColumnType.FLOAT),
+        },
+        geos={"a": SimpleNamespace(geo_id=10), "b": SimpleNamespace(geo_id=11)},
+        df=pd.DataFrame(
+            {
+                "name": pd.Series(["x", None], index=["a", "b"], dtype=str_dtype),
+                "area": [np.nan, 2.5],
+            },
+            index=["a", "b"],
+        ),
+    )
+
+    assert [row["val_str"] for row in inserts[0]] == ["x", None]
+    assert [row["val_float"] for row in inserts[1]] == [None, 2.5]
+
+
+@pytest.mark.parametrize("int_dtype", [np.int8, np.int16])
+def test_load_column_values_accepts_downcast_ints(int_dtype):
+    inserts = []
+    fake_insert_context(inserts).load_column_values(
+        cols={"pop": SimpleNamespace(col_id=1, type=ColumnType.INT)},
+        geos={"a": SimpleNamespace(geo_id=10), "b": SimpleNamespace(geo_id=11)},
+        df=pd.DataFrame({"pop": np.array([1, 100], dtype=int_dtype)}, index=["a", "b"]),
+    )
+
+    # Values reach the driver as native Python ints, not NumPy scalars.
+    values = [row["val_int"] for row in inserts[0]]
+    assert values == [1, 100]
+    assert all(type(value) is int for value in values)
+
+
+def test_copy_columns_writes_downcast_ints():
+    copies = []
+    fake_context(copies).copy_columns(
+        SimpleNamespace(__table__=SimpleNamespace(fullname="column_value")),
+        {"val_int": pd.Series([1, -7], dtype=np.int8).tolist()},
+    )
+
+    assert copies[0][1] == "1\n-7\n"
@@ -0,0 +1,44 @@
+"""Tests for reading downloaded (Geo)DataFrames."""
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+pytest.importorskip("gerrydb")
+
+from gerrydb_etl import read_dataframe  # noqa: E402
+
+
+@pytest.fixture
+def layer_path(tmp_path):
+    """Writes a small layer with a missing value in each property column."""
+    path = tmp_path / "layer.geojson"
+    gpd.GeoDataFrame(
+        {
+            "name": ["a", None, "c"],
+            "count": [1.0, None, 3.0],
+            "whole": [1.0, 2.0, 3.0],
+            "geometry": [Point(0, 0), Point(1, 1), Point(2, 2)],
+        },
+        crs="EPSG:4326",
+    ).to_file(path)
+    return path
+
+
+def test_read_dataframe_keeps_missing_values(layer_path):
+    df = read_dataframe(
+        str(layer_path), dtypes={"name": str, "count": int, "whole": int}
+    )
+
+    assert df["name"].isna().tolist() == [False, True, False]
+    assert "None" not in df["name"].tolist()
+    assert df["count"].isna().tolist() == [False, True, False]
+    assert pd.api.types.is_integer_dtype(df["whole"])
+    assert df["whole"].tolist() == [1, 2, 3]
+
+
+def test_read_dataframe_ignores_missing_columns(layer_path):
+    df = read_dataframe(str(layer_path), dtypes={"missing": int})
+
+    assert "missing" not in df.columns